@@ -1,3 +1,3 @@
-from .omnibus import Sender, Receiver, Message, WS_ORIGINATED_SUFFIX
+from .omnibus import Sender, Receiver, AsyncSender, AsyncReceiver, Message, WS_ORIGINATED_SUFFIX
 from . import util
-__all__ = ["Sender", "Receiver", "Message", "util", "WS_ORIGINATED_SUFFIX"]
+__all__ = ["Sender", "Receiver", "AsyncSender", "AsyncReceiver", "Message", "util", "WS_ORIGINATED_SUFFIX"]
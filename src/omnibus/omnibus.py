@@ -1,12 +1,14 @@
+from collections import deque
 from dataclasses import dataclass
 import socket
 import time
 
 import msgpack
 import zmq
+import zmq.asyncio
 from datetime import datetime
 
-from typing import Any, ClassVar
+from typing import Any, ClassVar, cast
 
 try:
     from . import server
@@ -38,6 +40,10 @@ class Message:
 # used by the bridge relay to avoid re-broadcasting them back to WS clients.
 WS_ORIGINATED_SUFFIX = "/WS_ORIGINATED"
 
+# Sent in place of the timestamp frame to mark a frame holding a batch of
+# messages. 0xc1 is never produced by msgpack, so it can't be a real timestamp.
+_BATCH_MARKER = b"\xc1"
+
 class OmnibusCommunicator:
     """
     Handles state shared between senders and receivers.
@@ -46,6 +52,8 @@ class OmnibusCommunicator:
     # These should've been initialized on __init__ and shouldn't change
     server_ip: ClassVar[str | None] = None
     context: ClassVar[zmq.Context[zmq.SyncSocket] | None] = None
+    # Shadows `context` for the asyncio senders and receivers, created on first use
+    async_context: ClassVar[zmq.asyncio.Context | None] = None
 
     def __init__(self, server_ip: str | None = None):
         if OmnibusCommunicator.context is None:
@@ -91,17 +99,115 @@ class OmnibusCommunicator:
                     return ip
                 print("Retrying...")
 
+    @staticmethod
+    def _get_async_context() -> zmq.asyncio.Context:
+        """
+        Return an asyncio context sharing the underlying ZMQ context with the
+        synchronous senders and receivers.
+        """
+        assert OmnibusCommunicator.context is not None
+        if OmnibusCommunicator.async_context is None:
+            OmnibusCommunicator.async_context = zmq.asyncio.Context.shadow(
+                OmnibusCommunicator.context
+            )
+        return OmnibusCommunicator.async_context
+
+
+class _BaseSender(OmnibusCommunicator):
+    """
+    Handles message packing and batching shared between Sender and AsyncSender.
+    Subclasses create the publisher socket and actually send the frames.
+    """
+
+    _batch_size: int
+    _batch_interval: float
+    # Pending (timestamp, payload) pairs and the time the first one was queued, per channel
+    _batches: dict[str, list[tuple[float, Any]]]
+    _batch_started: dict[str, float]
+
+    def __init__(
+        self,
+        server_ip: str | None = None,
+        *,
+        batch_size: int = 0,
+        batch_interval: float = 0.01,
+    ):
+        super().__init__(server_ip)
+        self._batch_size = batch_size
+        self._batch_interval = batch_interval
+        self._batches = {}
+        self._batch_started = {}
+
+    def _frames_for(self, message: Message) -> list[list[Any]]:
+        """
+        Return the multipart frames that are ready to be sent after queueing
+        a message. Without batching this is always the message itself.
+        """
+        if self._batch_size <= 0:
+            return [
+                [
+                    message.channel.encode("utf-8"),
+                    msgpack.packb(message.timestamp),
+                    msgpack.packb(message.payload),
+                ]
+            ]
+
+        batch = self._batches.setdefault(message.channel, [])
+        if not batch:
+            self._batch_started[message.channel] = time.monotonic()
+        batch.append((message.timestamp, message.payload))
+
+        ready: list[list[Any]] = []
+        if len(batch) >= self._batch_size:
+            ready.append(self._batch_frames(message.channel))
+
+        now = time.monotonic()
+        for channel, started in list(self._batch_started.items()):
+            if now - started >= self._batch_interval:
+                ready.append(self._batch_frames(channel))
+        return ready
+
+    def _flush_frames(self) -> list[list[Any]]:
+        """
+        Return the frames for every batch that is still waiting.
+        """
+        return [self._batch_frames(channel) for channel in list(self._batch_started)]
 
-class Sender(OmnibusCommunicator):
+    def _batch_frames(self, channel: str) -> list[Any]:
+        """
+        Take all pending messages on one channel and pack them into a single
+        batched frame.
+        """
+        batch = self._batches.pop(channel)
+        del self._batch_started[channel]
+        return [channel.encode("utf-8"), _BATCH_MARKER, msgpack.packb(batch)]
+
+
+class Sender(_BaseSender):
     """
     Allows messages to be sent to all of the receivers listening on the provided
     channel.
+
+    :param batch_size: OPTIONAL - Enable batching by coalescing up to this many messages
+            per channel into a single ZMQ frame. Default value is 0, which sends every
+            message immediately. Keyword parameter only.
+    :param batch_interval: OPTIONAL - Maximum number of seconds a message may wait in a
+            batch before it is sent. Only checked when sending, so call `flush()` if the
+            sender may go idle. Default value is 0.01 seconds. Keyword parameter only.
     """
 
     _publisher: zmq.SyncSocket
 
-    def __init__(self, server_ip: str | None = None):
-        super().__init__(server_ip)
+    def __init__(
+        self,
+        server_ip: str | None = None,
+        *,
+        batch_size: int = 0,
+        batch_interval: float = 0.01,
+    ):
+        super().__init__(
+            server_ip, batch_size=batch_size, batch_interval=batch_interval
+        )
         assert (
             OmnibusCommunicator.context is not None
             and OmnibusCommunicator.server_ip is not None
@@ -116,15 +222,11 @@ class Sender(OmnibusCommunicator):
         Send a built message object to all receivers.
 
         Note that channel used is specified by the message object rather than
-        the sender.
+        the sender. If batching is enabled the message may be held back until
+        its batch fills up or times out.
         """
-        self._publisher.send_multipart(
-            [
-                message.channel.encode("utf-8"),
-                msgpack.packb(message.timestamp),
-                msgpack.packb(message.payload),
-            ]
-        )
+        for frames in self._frames_for(message):
+            self._publisher.send_multipart(frames)
 
     def send(self, channel: str, payload) -> None:
         """
@@ -133,21 +235,74 @@ class Sender(OmnibusCommunicator):
         message = Message(channel, time.time(), payload)
         self.send_message(message)
 
+    def flush(self) -> None:
+        """
+        Immediately send every batched message that is still waiting. Does
+        nothing if batching is disabled.
+        """
+        for frames in self._flush_frames():
+            self._publisher.send_multipart(frames)
 
-class Receiver(OmnibusCommunicator):
+
+class AsyncSender(_BaseSender):
     """
-    Listens to a number of channels and receives all messages sent to them.
+    An asyncio version of Sender, taking the same parameters.
 
-    Filtering is based on only the beginning of the channel name, so for example
-    a receiver listening to the channel 'foo' will also receive messages sent
-    to 'foobar', and a receiver listing to the channel '' will receive all
-    messages.
+    Unlike Sender, messages are not silently dropped once the socket's send
+    queue is full. Instead sending waits until there is room again, so a
+    producer that outpaces the network is slowed down rather than losing data.
+    """
 
-    :param *channels: All the channels the receiver should be listening on, pass each as
-            individual parameters. Only the beginning of the name is matched.
-    :param seconds_until_reconnect_attempt: OPTIONAL - Specify the number of seconds the
-            Receiver should wait before attempting a reconnection when no messages
-            are being received. Default value is 5 seconds. Keyword parameter only.
+    _publisher: zmq.asyncio.Socket
+
+    def __init__(
+        self,
+        server_ip: str | None = None,
+        *,
+        batch_size: int = 0,
+        batch_interval: float = 0.01,
+    ):
+        super().__init__(
+            server_ip, batch_size=batch_size, batch_interval=batch_interval
+        )
+        assert OmnibusCommunicator.server_ip is not None
+        # XPUB behaves like PUB towards the server, but with XPUB_NODROP a full
+        # queue makes the send wait instead of discarding the message.
+        self._publisher = self._get_async_context().socket(zmq.XPUB)
+        self._publisher.setsockopt(zmq.XPUB_NODROP, 1)
+        self._publisher.connect(
+            f"tcp://{OmnibusCommunicator.server_ip}:{server.SOURCE_PORT}"
+        )
+
+    async def send_message(self, message: Message) -> None:
+        """
+        Send a built message object to all receivers.
+
+        Note that channel used is specified by the message object rather than
+        the sender.
+        """
+        for frames in self._frames_for(message):
+            await self._publisher.send_multipart(frames)
+
+    async def send(self, channel: str, payload) -> None:
+        """
+        Wrap a payload in a message object and send it on a provided channel.
+        """
+        await self.send_message(Message(channel, time.time(), payload))
+
+    async def flush(self) -> None:
+        """
+        Immediately send every batched message that is still waiting.
+        """
+        for frames in self._flush_frames():
+            await self._publisher.send_multipart(frames)
+
+
+class _BaseReceiver(OmnibusCommunicator):
+    """
+    Handles subscription, reconnection and message decoding shared between
+    Receiver and AsyncReceiver. Subclasses create the subscriber socket and
+    implement the receive methods.
     """
 
     _channels: tuple[str, ...]
@@ -156,45 +311,46 @@ class Receiver(OmnibusCommunicator):
     _last_online_check: float
     _disconnected: bool
     _seconds_until_attempt_reconnect: int
-
-    _subscriber: zmq.SyncSocket
+    # Messages already unpacked from a batched frame but not yet returned
+    _pending: deque[Message]
+    # Reused for every frame to avoid setting up a new unpacker per message
+    _unpacker: msgpack.Unpacker
 
     def __init__(self, *channels: str, server_ip: str | None = None, seconds_until_reconnect_attempt: int = 5):
-        """
-        Listens to a number of channels and receives all messages sent to them.
-
-        Filtering is based on only the beginning of the channel name, so for example
-        a receiver listening to the channel 'foo' will also receive messages sent
-        to 'foobar', and a receiver listing to the channel '' will receive all
-        messages.
-
-        :param *channels: All the channels the receiver should be listening on, pass each as
-                individual parameters. Only the beginning of the name is matched. '' means all channels.
-        :param seconds_until_reconnect_attempt: OPTIONAL - Specify the number of seconds the
-                Receiver should wait before attempting a reconnection when no messages
-                are being received. Default value is 5 seconds. Keyword parameter only.
-        """
         super().__init__(server_ip)
         self._last_online_check = time.time()
         self._channels = channels
         self._seconds_until_attempt_reconnect = seconds_until_reconnect_attempt
         self._disconnected = False
+        self._pending = deque()
+        self._unpacker = msgpack.Unpacker()
         self._connect()
 
     def _connect(self) -> None:
         """
         Create ZMQ subscriber and connect to server
         """
-        assert (
-            OmnibusCommunicator.server_ip is not None
-            and OmnibusCommunicator.context is not None
-        )
-        self._subscriber = OmnibusCommunicator.context.socket(zmq.SUB)
-        self._subscriber.connect(
+        raise NotImplementedError
+
+    def _reset(self) -> None:
+        """
+        Restart the ZMQ Socket of this receiver instance. Called when the Receiver
+        has not received any data for over a given number of seconds, specified
+        by seconds_until_reconnect_attempt.
+        """
+        raise NotImplementedError
+
+    def _subscribe(self, subscriber: zmq.Socket[Any]) -> None:
+        """
+        Connect a freshly created subscriber to the server and subscribe it to
+        our channels.
+        """
+        assert OmnibusCommunicator.server_ip is not None
+        subscriber.connect(
             f"tcp://{OmnibusCommunicator.server_ip}:{server.SINK_PORT}"
         )
         for channel in self._channels:
-            self._subscriber.setsockopt(zmq.SUBSCRIBE, channel.encode("utf-8"))
+            subscriber.setsockopt(zmq.SUBSCRIBE, channel.encode("utf-8"))
 
     def _check_online_and_reconnect(self, poll_result: int) -> None:
         """
@@ -229,6 +385,78 @@ class Receiver(OmnibusCommunicator):
             self._last_online_check = time.time()
             self._reset()
 
+    def _queue_frames(self, frames: list[zmq.Frame]) -> None:
+        """
+        Decode one multipart frame received without copying and queue the
+        message, or messages if the frame is batched, that it carries.
+        """
+        channel, timestamp, payload = frames
+        channel_name = channel.bytes.decode(encoding="utf-8")
+        if timestamp.bytes == _BATCH_MARKER:
+            self._unpacker.feed(payload.buffer)
+            self._pending.extend(
+                Message(channel_name, batch_timestamp, batch_payload)
+                for batch_timestamp, batch_payload in self._unpacker.unpack()
+            )
+            return
+        self._unpacker.feed(timestamp.buffer)
+        self._unpacker.feed(payload.buffer)
+        self._pending.append(
+            Message(
+                channel=channel_name,
+                timestamp=self._unpacker.unpack(),
+                payload=self._unpacker.unpack(),
+            )
+        )
+
+
+class Receiver(_BaseReceiver):
+    """
+    Listens to a number of channels and receives all messages sent to them.
+
+    Filtering is based on only the beginning of the channel name, so for example
+    a receiver listening to the channel 'foo' will also receive messages sent
+    to 'foobar', and a receiver listing to the channel '' will receive all
+    messages.
+
+    :param *channels: All the channels the receiver should be listening on, pass each as
+            individual parameters. Only the beginning of the name is matched.
+    :param seconds_until_reconnect_attempt: OPTIONAL - Specify the number of seconds the
+            Receiver should wait before attempting a reconnection when no messages
+            are being received. Default value is 5 seconds. Keyword parameter only.
+    """
+
+    _subscriber: zmq.SyncSocket
+
+    def __init__(self, *channels: str, server_ip: str | None = None, seconds_until_reconnect_attempt: int = 5):
+        """
+        Listens to a number of channels and receives all messages sent to them.
+
+        Filtering is based on only the beginning of the channel name, so for example
+        a receiver listening to the channel 'foo' will also receive messages sent
+        to 'foobar', and a receiver listing to the channel '' will receive all
+        messages.
+
+        :param *channels: All the channels the receiver should be listening on, pass each as
+                individual parameters. Only the beginning of the name is matched. '' means all channels.
+        :param seconds_until_reconnect_attempt: OPTIONAL - Specify the number of seconds the
+                Receiver should wait before attempting a reconnection when no messages
+                are being received. Default value is 5 seconds. Keyword parameter only.
+        """
+        super().__init__(
+            *channels,
+            server_ip=server_ip,
+            seconds_until_reconnect_attempt=seconds_until_reconnect_attempt,
+        )
+
+    def _connect(self) -> None:
+        """
+        Create ZMQ subscriber and connect to server
+        """
+        assert OmnibusCommunicator.context is not None
+        self._subscriber = OmnibusCommunicator.context.socket(zmq.SUB)
+        self._subscribe(self._subscriber)
+
     def recv_message(self, timeout: int | None = None) -> Message | None:
         """
         Receive one message from a sender.
@@ -236,7 +464,13 @@ class Receiver(OmnibusCommunicator):
         If timeout is None this blocks until a message is received. Otherwise it
         waits for timeout milliseconds to receive a message and returns None. A
         zero timeout is supported for nonblocking operation.
+
+        Batched frames are split back into individual messages, which are
+        returned one at a time by subsequent calls.
         """
+        if self._pending:
+            return self._pending.popleft()
+
         # Ensure that we do still check for network loss even when timeout is large or infinite
         actual_timeout = (
             self._seconds_until_attempt_reconnect * 1000
@@ -262,14 +496,47 @@ class Receiver(OmnibusCommunicator):
                 continue
 
             # If there is a message received, proceed below:
-            channel, timestamp, payload = self._subscriber.recv_multipart()
-            return Message(
-                channel=channel.decode(encoding="utf-8"),
-                timestamp=msgpack.unpackb(timestamp),
-                payload=msgpack.unpackb(payload),
-            )
+            self._recv_frames()
+            return self._pending.popleft()
         return None
 
+    def recv_many(
+        self, max_messages: int | None = None, timeout: int | None = 0
+    ) -> list[Message]:
+        """
+        Receive all messages currently queued on the socket in one pass.
+
+        Waits for the first message the same way as `recv_message` (so timeout
+        is in milliseconds, None blocks and 0 doesn't wait), then drains
+        everything else already queued without polling again. At most
+        max_messages are returned if given, the rest are kept for the next
+        call. Returns an empty list if nothing was received.
+        """
+        messages: list[Message] = []
+        if not self._pending:
+            first = self.recv_message(timeout)
+            if first is None:
+                return messages
+            messages.append(first)
+
+        while max_messages is None or len(messages) < max_messages:
+            if not self._pending:
+                try:
+                    self._recv_frames(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+            messages.append(self._pending.popleft())
+        return messages
+
+    def _recv_frames(self, flags: int = 0) -> None:
+        """
+        Receive one multipart frame from the subscriber and queue the message,
+        or messages if the frame is batched, that it carries.
+
+        Raises zmq.Again if flags contains zmq.NOBLOCK and nothing is queued.
+        """
+        self._queue_frames(self._subscriber.recv_multipart(flags, copy=False))
+
     def recv(self, timeout: int | None = None) -> Any | None:
         """
         Receive the payload of one message from a sender, discarding metadata.
@@ -291,3 +558,102 @@ class Receiver(OmnibusCommunicator):
         """
         self._subscriber.close(linger=0)
         self._connect()
+
+
+class AsyncReceiver(_BaseReceiver):
+    """
+    An asyncio version of Receiver, taking the same parameters and following the
+    same reconnection rules. Iterating over it with `async for` yields messages
+    as they arrive, forever.
+    """
+
+    _subscriber: zmq.asyncio.Socket
+
+    def _connect(self) -> None:
+        """
+        Create ZMQ subscriber and connect to server
+        """
+        self._subscriber = self._get_async_context().socket(zmq.SUB)
+        self._subscribe(self._subscriber)
+
+    def _reset(self) -> None:
+        """
+        Restart the ZMQ Socket of this receiver instance, see Receiver._reset.
+        """
+        self._subscriber.close(linger=0)
+        self._connect()
+
+    async def recv_message(self, timeout: int | None = None) -> Message | None:
+        """
+        Receive one message from a sender.
+
+        If timeout is None this waits until a message is received. Otherwise it
+        waits for timeout milliseconds to receive a message and returns None.
+        """
+        if self._pending:
+            return self._pending.popleft()
+
+        # Still wake up periodically to check for network loss, see Receiver
+        actual_timeout = (
+            self._seconds_until_attempt_reconnect * 1000
+            if timeout is None
+            else min(timeout, self._seconds_until_attempt_reconnect * 1000)
+        )
+        elapsed_time_ms = 0
+        while timeout is None or elapsed_time_ms < timeout or timeout == 0:
+            poll_result = cast(int, await self._subscriber.poll(timeout=actual_timeout))
+            self._check_online_and_reconnect(poll_result)
+
+            if poll_result == 0:
+                if timeout == 0:
+                    break
+                if timeout is not None:
+                    elapsed_time_ms += actual_timeout
+                    actual_timeout = min(timeout - elapsed_time_ms, actual_timeout)
+                continue
+
+            self._queue_frames(await self._subscriber.recv_multipart(copy=False))
+            return self._pending.popleft()
+        return None
+
+    async def recv_many(
+        self, max_messages: int | None = None, timeout: int | None = 0
+    ) -> list[Message]:
+        """
+        Receive all messages currently queued on the socket in one pass. See
+        Receiver.recv_many.
+        """
+        messages: list[Message] = []
+        if not self._pending:
+            first = await self.recv_message(timeout)
+            if first is None:
+                return messages
+            messages.append(first)
+
+        while max_messages is None or len(messages) < max_messages:
+            if not self._pending:
+                try:
+                    self._queue_frames(
+                        await self._subscriber.recv_multipart(zmq.NOBLOCK, copy=False)
+                    )
+                except zmq.Again:
+                    break
+            messages.append(self._pending.popleft())
+        return messages
+
+    async def recv(self, timeout: int | None = None) -> Any | None:
+        """
+        Receive the payload of one message from a sender, discarding metadata.
+        """
+        if message := await self.recv_message(timeout):
+            return message.payload
+        return None
+
+    def __aiter__(self) -> "AsyncReceiver":
+        return self
+
+    async def __anext__(self) -> Message:
+        message = await self.recv_message()
+        # Without a timeout recv_message only returns once it has a message
+        assert message is not None
+        return message
@@ -1,3 +1,4 @@
+import asyncio
 import io
 import multiprocessing as mp
 from multiprocessing.context import SpawnProcess
@@ -7,7 +8,7 @@ from typing import Callable
 
 import pytest
 
-from omnibus import Sender, Receiver, Message, server
+from omnibus import Sender, Receiver, AsyncSender, AsyncReceiver, Message, server
 from omnibus.omnibus import OmnibusCommunicator
 
 
@@ -109,6 +110,84 @@ class TestOmnibus:
         s.send("CHAN", "A")
         assert r.recv(6000) == "A"
 
+    def test_batched_send(self, sender, receiver):
+        s = sender(batch_size=3, batch_interval=10)
+        r = receiver("CHAN")
+        s.send_message(Message("CHAN1", 1, "A"))
+        s.send_message(Message("CHAN1", 2, "B"))
+        s.send_message(Message("CHAN2", 3, "C"))
+        assert r.recv(10) is None  # neither batch is full yet
+        s.send_message(Message("CHAN1", 4, "D"))
+        assert r.recv_message(10) == Message("CHAN1", 1, "A")
+        assert r.recv_message(10) == Message("CHAN1", 2, "B")
+        assert r.recv_message(10) == Message("CHAN1", 4, "D")
+        assert r.recv(10) is None
+        s.flush()
+        assert r.recv_message(10) == Message("CHAN2", 3, "C")
+        assert r.recv(10) is None
+
+    def test_batch_interval(self, sender, receiver):
+        s = sender(batch_size=100, batch_interval=0.02)
+        r = receiver("CHAN")
+        s.send("CHAN", "A")
+        assert r.recv(10) is None
+        time.sleep(0.03)
+        s.send("CHAN", "B")  # the expired batch is sent on the next send
+        assert r.recv(10) == "A"
+        assert r.recv(10) == "B"
+
+    def test_recv_many(self, sender, receiver):
+        s = sender()
+        r = receiver("CHAN")
+        assert r.recv_many() == []
+        for i in range(5):
+            s.send_message(Message("CHAN", i, i))
+        time.sleep(0.05)  # let every message arrive before draining
+        assert r.recv_many(max_messages=3, timeout=10) == [
+            Message("CHAN", i, i) for i in range(3)
+        ]
+        assert r.recv_many(timeout=10) == [Message("CHAN", i, i) for i in range(3, 5)]
+        assert r.recv_many(timeout=10) == []
+
+    def test_recv_many_batched(self, sender, receiver):
+        s = sender(batch_size=4)
+        r = receiver("CHAN")
+        for i in range(4):
+            s.send_message(Message("CHAN", i, {"value": i}))
+        assert r.recv_many(max_messages=3, timeout=10) == [
+            Message("CHAN", i, {"value": i}) for i in range(3)
+        ]
+        assert r.recv_message(10) == Message("CHAN", 3, {"value": 3})
+
+    def test_async(self):
+        async def run():
+            s = AsyncSender()
+            r = AsyncReceiver("CHAN")
+            await asyncio.sleep(0.05)  # let the receiver connect to the server
+            await s.send("CHAN1", "A")
+            await s.send_message(Message("CHAN2", 10, "B"))
+            assert await r.recv(10) == "A"
+            assert await r.recv_message(10) == Message("CHAN2", 10, "B")
+            assert await r.recv(10) is None
+
+        asyncio.run(run())
+
+    def test_async_iteration(self, sender):
+        async def run():
+            r = AsyncReceiver("CHAN")
+            await asyncio.sleep(0.05)  # let the receiver connect to the server
+            s = sender(batch_size=3)
+            for i in range(3):
+                s.send("CHAN", i)
+            received = []
+            async for message in r:
+                received.append(message.payload)
+                if len(received) == 3:
+                    break
+            assert received == [0, 1, 2]
+
+        asyncio.run(run())
+
 
 class TestIPBroadcast:
     @pytest.fixture()